@@ -544,6 +544,20 @@ class BarcodeProductionVerifier:
         
         print("=" * 60)
     
+    def _flush_buffer(self, cap, max_frames=10):
+        """Drop frames queued in the capture buffer.
+        
+        A grab() that returns instantly came from the buffer; once one blocks
+        for more than 15 ms the next frame is coming off the wire.
+        """
+        for _ in range(max_frames):
+            start = time.monotonic()
+            if not cap.grab():
+                return False
+            if time.monotonic() - start > 0.015:
+                break
+        return True
+    
     def run(self):
         """Main loop - run the verification system."""
         print("\n" + "=" * 60)
@@ -671,6 +685,11 @@ class BarcodeProductionVerifier:
             
             elif key == ord('c'):
                 print("\n[CAPTURE] Capturing reference barcode...")
+                # Capture from a live frame, not one that sat in the buffer
+                if self._flush_buffer(cap):
+                    ret, fresh = cap.retrieve()
+                    if ret:
+                        frame = fresh
                 self.capture_reference(frame)
             
             elif key == ord('s'):
@@ -37,6 +37,10 @@ class HardwareBarcodeVerifier:
         self.LCD_COLS = 16
         self.LCD_ROWS = 2
         
+        # Button callbacks run on the GPIO event thread; guard shared state
+        self.state_lock = threading.RLock()
+        self.capture_requested = threading.Event()
+        
         # Initialize GPIO
         self.setup_gpio()
         
@@ -60,10 +64,12 @@ class HardwareBarcodeVerifier:
         self.log_file = "production_log_hardware.csv"
         self.setup_logging()
         
-        # Button state tracking
-        self.gpio_available = False
-        self.last_start_btn_state = GPIO.HIGH
-        self.last_capture_btn_state = GPIO.HIGH
+        # Button state tracking (polled lgpio path only)
+        self.last_start_btn_state = 1
+        self.last_capture_btn_state = 1
+        
+        # Edge-triggered buttons (RPi.GPIO); enabled once all state exists
+        self.setup_button_callbacks()
         
         print("Hardware-Enhanced Barcode Verification System Initialized!")
         self.display_status("System Ready", "Press C to start")
@@ -107,6 +113,21 @@ class HardwareBarcodeVerifier:
             print(f"GPIO setup failed: {e}")
             print("Running in software-only mode (keyboard controls only)")
     
+    def setup_button_callbacks(self):
+        """Register falling-edge callbacks for both buttons (RPi.GPIO)"""
+        if not self.gpio_available or GPIO_LIBRARY != "RPi.GPIO":
+            return
+        
+        try:
+            GPIO.add_event_detect(self.START_BTN_PIN, GPIO.FALLING, 
+                                  callback=lambda channel: self.handle_start_button(), 
+                                  bouncetime=200)
+            GPIO.add_event_detect(self.CAPTURE_BTN_PIN, GPIO.FALLING, 
+                                  callback=lambda channel: self.handle_capture_button(), 
+                                  bouncetime=200)
+        except Exception as e:
+            print(f"Button callback setup failed: {e}")
+    
     def setup_lcd(self):
         """Initialize I2C LCD display"""
         try:
@@ -125,12 +146,13 @@ class HardwareBarcodeVerifier:
         """Display status on LCD"""
         if self.lcd:
             try:
-                self.lcd.clear()
-                self.lcd.cursor_pos = (0, 0)
-                self.lcd.write_string(line1[:self.LCD_COLS])
-                if line2:
-                    self.lcd.cursor_pos = (1, 0)
-                    self.lcd.write_string(line2[:self.LCD_COLS])
+                with self.state_lock:
+                    self.lcd.clear()
+                    self.lcd.cursor_pos = (0, 0)
+                    self.lcd.write_string(line1[:self.LCD_COLS])
+                    if line2:
+                        self.lcd.cursor_pos = (1, 0)
+                        self.lcd.write_string(line2[:self.LCD_COLS])
             except Exception as e:
                 print(f"LCD display error: {e}")
     
@@ -194,29 +216,12 @@ class HardwareBarcodeVerifier:
             print(f"Buzzer error: {e}")
     
     def check_buttons(self):
-        """Check button states and handle presses"""
+        """Poll button states (lgpio only; RPi.GPIO uses edge callbacks)"""
         if not self.gpio_available:
             return
             
         try:
-            if GPIO_LIBRARY == "RPi.GPIO":
-                # Check start/stop button (GPIO 22)
-                start_btn_state = GPIO.input(self.START_BTN_PIN)
-                if start_btn_state == GPIO.LOW and self.last_start_btn_state == GPIO.HIGH:
-                    # Button pressed (falling edge)
-                    self.handle_start_button()
-                    time.sleep(0.1)  # Debounce
-                self.last_start_btn_state = start_btn_state
-                
-                # Check capture button (GPIO 27)
-                capture_btn_state = GPIO.input(self.CAPTURE_BTN_PIN)
-                if capture_btn_state == GPIO.LOW and self.last_capture_btn_state == GPIO.HIGH:
-                    # Button pressed (falling edge)
-                    self.handle_capture_button()
-                    time.sleep(0.1)  # Debounce
-                self.last_capture_btn_state = capture_btn_state
-                
-            elif GPIO_LIBRARY == "RPi.lgpio":
+            if GPIO_LIBRARY == "RPi.lgpio":
                 # Check start/stop button (GPIO 22)
                 start_btn_state = GPIO.gpio_read(self.gpio_handle, self.START_BTN_PIN)
                 if start_btn_state == 0 and self.last_start_btn_state == 1:
@@ -238,27 +243,29 @@ class HardwareBarcodeVerifier:
     
     def handle_start_button(self):
         """Handle start/stop button press"""
-        if not self.reference_barcode:
-            self.display_status("No Reference!", "Press C first")
-            self.play_buzzer_tone("error")
-            print("\n[WARNING] Cannot start production - no reference barcode set!")
-        else:
-            self.production_mode = not self.production_mode
-            if self.production_mode:
-                self.display_status("Production ON", f"Ref: {self.reference_barcode[:8]}...")
-                self.play_buzzer_tone("start")
-                print("\n[START] PRODUCTION MODE STARTED")
-                self.last_scan_time = 0
+        with self.state_lock:
+            if not self.reference_barcode:
+                self.display_status("No Reference!", "Press C first")
+                self.play_buzzer_tone("error")
+                print("\n[WARNING] Cannot start production - no reference barcode set!")
             else:
-                self.display_status("Production OFF", "Press S to start")
-                self.play_buzzer_tone("stop")
-                print("\n[PAUSE] PRODUCTION MODE PAUSED")
+                self.production_mode = not self.production_mode
+                if self.production_mode:
+                    self.display_status("Production ON", f"Ref: {self.reference_barcode[:8]}...")
+                    self.play_buzzer_tone("start")
+                    print("\n[START] PRODUCTION MODE STARTED")
+                    self.last_scan_time = 0
+                else:
+                    self.display_status("Production OFF", "Press S to start")
+                    self.play_buzzer_tone("stop")
+                    print("\n[PAUSE] PRODUCTION MODE PAUSED")
     
     def handle_capture_button(self):
         """Handle capture reference button press"""
         print("\n[CAPTURE] Capturing reference barcode...")
         self.display_status("Capturing...", "Point at barcode")
-        # Note: We'll capture the reference in the main loop when this button is pressed
+        # The main loop captures the reference on its next frame
+        self.capture_requested.set()
     
     def setup_logging(self):
         """Setup CSV logging"""
@@ -338,8 +345,9 @@ class HardwareBarcodeVerifier:
         
         if barcodes:
             barcode = barcodes[0]  # Use first detected barcode
-            self.reference_barcode = barcode.data.decode('utf-8')
-            self.reference_type = barcode.type
+            with self.state_lock:
+                self.reference_barcode = barcode.data.decode('utf-8')
+                self.reference_type = barcode.type
             
             self.display_status("Reference Set!", f"{self.reference_type}: {self.reference_barcode[:8]}...")
             self.play_buzzer_tone("reference_captured")
@@ -482,8 +490,6 @@ class HardwareBarcodeVerifier:
         self.display_status("Camera Ready", "Press C to start")
         
         # Main loop
-        capture_requested = False
-        
         try:
             frame_count = 0
             while True:
@@ -503,11 +509,9 @@ class HardwareBarcodeVerifier:
                 self.check_buttons()
                 
                 # Handle capture request from button
-                if capture_requested:
-                    if self.capture_reference(frame):
-                        capture_requested = False
-                    else:
-                        capture_requested = False
+                if self.capture_requested.is_set():
+                    self.capture_requested.clear()
+                    self.capture_reference(frame)
                 
                 # Detect barcodes
                 barcodes = self.detect_barcodes(frame)
@@ -546,7 +550,7 @@ class HardwareBarcodeVerifier:
                     print("H - Show this help")
                     print("=" * 60)
                 elif key == ord('c'):
-                    capture_requested = True
+                    self.capture_requested.set()
                 elif key == ord('s'):
                     self.handle_start_button()
         
@@ -20,14 +20,25 @@ Keyboard Controls (fallback):
 import cv2
 import numpy as np
 from pyzbar import pyzbar
+from pyzbar.pyzbar import ZBarSymbol
 import time
 import csv
 from datetime import datetime
 import os
 import subprocess
 import threading
+import queue
 import signal
+import socket
 import sys
+import zlib
+from concurrent.futures import ThreadPoolExecutor
+from urllib.parse import urlparse
+
+if os.name == 'nt':
+    import msvcrt
+else:
+    import select
 
 # GPIO imports with fallback
 try:
@@ -47,10 +58,79 @@ except ImportError:
     LCD_AVAILABLE = False
     print("⚠ RPLCD not available - using console output")
 
+# Numba imports with fallback
+try:
+    from numba import njit
+    NUMBA_AVAILABLE = True
+    print("✓ Numba available")
+except ImportError:
+    NUMBA_AVAILABLE = False
+    print("⚠ Numba not available - using NumPy log tallies and point mapping")
+
+
+# Compact binary log: one record per logged result, alongside the CSV
+RESULT_CODES = {'PASS': 0, 'MISMATCH': 1, 'NO_BARCODE': 2, 'REFERENCE_SET': 3}
+LOG_RECORD = np.dtype([('timestamp', '<f8'), ('code', 'u1')])
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, nogil=True)
+    def count_result_codes(codes, n_codes):
+        """Count occurrences of each result code (0..n_codes-1)."""
+        counts = np.zeros(n_codes, np.int64)
+        for code in codes:
+            if code < n_codes:
+                counts[code] += 1
+        return counts
+else:
+    def count_result_codes(codes, n_codes):
+        """Count occurrences of each result code (0..n_codes-1)."""
+        return np.bincount(codes, minlength=n_codes)[:n_codes]
+
+if NUMBA_AVAILABLE:
+    @njit(cache=True, nogil=True)
+    def map_points(points, dx, dy, scale, out):
+        """Shift then scale (N, 2) integer points into out (int32)."""
+        for i in range(points.shape[0]):
+            out[i, 0] = int((points[i, 0] + dx) * scale)
+            out[i, 1] = int((points[i, 1] + dy) * scale)
+        return out
+else:
+    def map_points(points, dx, dy, scale, out):
+        """Shift then scale (N, 2) integer points into out (int32)."""
+        out[:] = (points + (dx, dy)) * scale
+        return out
+
 
 class HardwareBarcodeVerifier:
     """Hardware-enhanced barcode verification system with GPIO controls."""
     
+    # Symbologies handed to zbar: the 1D formats the system supports. Leaving
+    # out QR/PDF417/DataBar skips their scanner passes on every decode.
+    SYMBOLS = [
+        ZBarSymbol.EAN13, ZBarSymbol.EAN8, ZBarSymbol.UPCA, ZBarSymbol.UPCE,
+        ZBarSymbol.CODE128, ZBarSymbol.CODE39, ZBarSymbol.I25, ZBarSymbol.CODABAR,
+    ]
+    
+    # Overlay colors (BGR) by detection status
+    OVERLAY_COLORS = {
+        'MATCH': (0, 255, 0),        # Green for match
+        'MISMATCH': (0, 0, 255),     # Red for mismatch
+        'DETECTED': (255, 255, 0),   # Yellow for reference mode
+    }
+    
+    # Tone patterns as (frequency Hz, seconds) steps; 0 Hz is silence.
+    # The buzzer plays them as on/off, the speaker fallback at the given pitch.
+    TONE_PATTERNS = {
+        'success': [(1000, 0.2)],                             # Short high beep
+        'mismatch': [(800, 0.15), (0, 0.1)] * 2,              # Two medium beeps
+        'no_barcode': [(400, 0.5)],                           # Long low beep
+        'reference_captured': [(600, 0.1), (0, 0.05), (800, 0.1), (0, 0.05), 
+                               (1000, 0.1), (0, 0.05)],       # Three ascending beeps
+        'start': [(1000, 0.3)],
+        'stop': [(800, 0.2)],
+        'error': [(1000, 0.1), (0, 0.1)] * 3,                 # 3 quick beeps
+    }
+    
     def __init__(self):
         # Hardware configuration
         self.CAPTURE_BTN_PIN = 22    # GPIO 22 - Capture reference
@@ -59,15 +139,43 @@ class HardwareBarcodeVerifier:
         self.LCD_ADDRESS = 0x27      # I2C LCD address
         self.LCD_COLS = 16
         self.LCD_ROWS = 2
+        self._lcd_rows = [None] * self.LCD_ROWS  # Last text sent to each row
+        
+        # Camera pipeline for the Pi: drop=true max-buffers=1 keeps only the newest frame
+        self.GST_PIPELINE = ('v4l2src device=/dev/video0 ! '
+                             'video/x-raw,width=1280,height=720,framerate=30/1 ! '
+                             'videoconvert ! video/x-raw,format=BGR ! '
+                             'appsink drop=true max-buffers=1')
+        
+        # Button events from the GPIO callback thread, drained by the main loop
+        self._event_q = queue.Queue()
+        
+        # Buzzer patterns are played by one worker thread, fed by this queue
+        self._buzzer_q = queue.Queue()
         
         # Initialize hardware
         self.setup_hardware()
+        if self.hardware_available:
+            threading.Thread(target=self._buzzer_worker, daemon=True).start()
+        
+        # Speaker fallback tones (used when the buzzer is unavailable)
+        self.SPEAKER_RATE = 22050
+        self.speaker_tones = self.build_speaker_tones()
+        self.speaker_proc = None
         
         # Barcode verification settings
         self.reference_barcode = None
         self.reference_type = None
         self.production_mode = False
         self.log_file = "production_log_hardware.csv"
+        self.bin_log_file = "production_log_hardware.bin"
+        
+        # Log handles stay open; fsync to disk every LOG_SYNC_EVERY results
+        self.LOG_SYNC_EVERY = 50
+        self._log_fh = None
+        self._log_writer = None
+        self._bin_log_fh = None
+        self._unsynced = 0
         
         # Statistics
         self.stats = {
@@ -80,11 +188,63 @@ class HardwareBarcodeVerifier:
         # Performance tracking
         self.last_scan_time = 0
         self.scan_interval = 1.5  # seconds (for 40 items/min)
+        self.ui_interval = 0.1  # seconds between display repaints (10 Hz is plenty for operators)
+        
+        # Display settings - overlays are drawn on a downscaled copy of the frame
+        self.display_scale = 0.5
+        self.headless = (sys.platform.startswith('linux') and 
+                         not os.environ.get('DISPLAY') and 
+                         not os.environ.get('WAYLAND_DISPLAY'))
+        
+        # Region of interest on the conveyor belt (x, y, w, h)
+        # None = middle ROI_FRACTION of the frame, resolved on first frame
+        self.roi = None
+        self.ROI_FRACTION = 0.6
+        
+        # Status panel cache (re-rendered only when the shown state changes)
+        self.PANEL_HEIGHT = 220
+        self.FOOTER_HEIGHT = 50
+        self._panel_cache = None
+        self._panel_hash = None
+        self._panel_bg = None
+        self._panel_bg_key = None
+        
+        # Keyboard dispatch; handlers take (frame, gray, enhanced), True = quit
+        self._keymap = {
+            ord('q'): self._cmd_quit,
+            ord('c'): self._cmd_capture,
+            ord('s'): self._cmd_start,
+            ord('r'): self._cmd_reset,
+            ord('l'): self._cmd_logs,
+            ord('h'): self._cmd_help,
+        }
+        
+        # Buffers reused by to_gray()/equalize() - only valid until the next frame
+        self._eq_hist = np.empty((256, 1), np.float32)
+        self._gray_buf = None
+        self._eq_buf = None
+        
+        # Live-view decode cache for static scenes (expires after DECODE_CACHE_TTL s)
+        self.DECODE_CACHE_TTL = 2.0
+        self._decode_hash = None
+        self._decode_hash_time = 0
+        self._decode_cache = []
+        
+        # Partial console input for the demo-mode reader
+        self._console_line = ''
         
-        # Button state tracking
-        self.capture_requested = False
-        self.last_capture_btn_state = True
-        self.last_start_btn_state = True
+        # Scratch vertex buffer for draw_overlay (pyzbar polygons are small)
+        self._poly_scratch = np.empty((8, 2), np.int32)
+        
+        # Compile the point-mapping kernel now rather than on the first detection
+        warm = np.zeros((4, 2), np.int32)
+        map_points(warm, 0, 0, 1.0, warm)
+        
+        # pollKey needs OpenCV >= 4.5; older builds fall back to waitKey(1)
+        self.poll_key = getattr(cv2, 'pollKey', lambda: cv2.waitKey(1))
+        
+        # Reused display buffer (avoids a full-frame allocation per repaint)
+        self._display_buf = None
         
         # Initialize log file
         self._initialize_log_file()
@@ -112,8 +272,8 @@ class HardwareBarcodeVerifier:
         # Setup GPIO buttons and buzzer
         if GPIOZERO_AVAILABLE:
             try:
-                self.capture_button = Button(self.CAPTURE_BTN_PIN, pull_up=True)
-                self.start_button = Button(self.START_BTN_PIN, pull_up=True)
+                self.capture_button = Button(self.CAPTURE_BTN_PIN, pull_up=True, bounce_time=0.02)
+                self.start_button = Button(self.START_BTN_PIN, pull_up=True, bounce_time=0.02)
                 self.buzzer = Buzzer(self.BUZZER_PIN)
                 
                 # Set up button event handlers
@@ -139,9 +299,8 @@ class HardwareBarcodeVerifier:
                                  port=1, cols=self.LCD_COLS, rows=self.LCD_ROWS, 
                                  charmap='A02', auto_linebreaks=True)
                 self.lcd.clear()
-                self.lcd.write_string("Barcode Verifier")
-                self.lcd.cursor_pos = (1, 0)
-                self.lcd.write_string("Hardware Ready")
+                self.write_lcd_row(0, "Barcode Verifier")
+                self.write_lcd_row(1, "Hardware Ready")
                 print(f"✓ I2C LCD initialized on address 0x{self.LCD_ADDRESS:02X}")
             except Exception as e:
                 print(f"⚠ LCD setup failed: {e}")
@@ -150,17 +309,24 @@ class HardwareBarcodeVerifier:
             self.lcd = None
             print("⚠ LCD not available - using console output")
     
+    def write_lcd_row(self, row, text):
+        """Write one padded LCD row, skipping the I2C transfer if it is unchanged."""
+        text = text[:self.LCD_COLS].ljust(self.LCD_COLS)
+        if text == self._lcd_rows[row]:
+            return
+        self.lcd.cursor_pos = (row, 0)
+        self.lcd.write_string(text)
+        self._lcd_rows[row] = text
+    
     def display_status(self, line1, line2=""):
         """Display status on LCD and console."""
         if self.lcd:
             try:
-                self.lcd.clear()
-                self.lcd.cursor_pos = (0, 0)
-                self.lcd.write_string(line1[:self.LCD_COLS])
-                if line2:
-                    self.lcd.cursor_pos = (1, 0)
-                    self.lcd.write_string(line2[:self.LCD_COLS])
+                # Padding overwrites old text, so no clear() is needed
+                self.write_lcd_row(0, line1)
+                self.write_lcd_row(1, line2)
             except Exception as e:
+                self._lcd_rows = [None] * self.LCD_ROWS  # Display state unknown
                 print(f"LCD display error: {e}")
         
         # Console fallback
@@ -170,89 +336,89 @@ class HardwareBarcodeVerifier:
     def play_buzzer_tone(self, tone_type):
         """Play different buzzer tones for different events."""
         if not self.hardware_available:
-            # Fallback to speaker-test
+            # Fallback to the speaker
             self.play_speaker_tone(tone_type)
             return
         
-        def buzzer_thread():
+        # Queue for the buzzer worker so the caller never waits on a pattern
+        self._buzzer_q.put(tone_type)
+    
+    def _buzzer_worker(self):
+        """Buzzer thread - play queued tone patterns one after another."""
+        while True:
+            tone_type = self._buzzer_q.get()
             try:
-                if tone_type == 'success':
-                    # Short high beep for success
-                    self.buzzer.on()
-                    time.sleep(0.2)
-                    self.buzzer.off()
-                elif tone_type == 'mismatch':
-                    # Two medium beeps for mismatch
-                    for _ in range(2):
+                for freq, duration in self.TONE_PATTERNS.get(tone_type, ()):
+                    # Active buzzer: any non-zero frequency just means "on"
+                    if freq:
                         self.buzzer.on()
-                        time.sleep(0.15)
-                        self.buzzer.off()
-                        time.sleep(0.1)
-                elif tone_type == 'no_barcode':
-                    # Long low beep for no barcode
-                    self.buzzer.on()
-                    time.sleep(0.5)
-                    self.buzzer.off()
-                elif tone_type == 'reference_captured':
-                    # Three ascending beeps for reference capture
-                    for i in range(3):
-                        self.buzzer.on()
-                        time.sleep(0.1)
-                        self.buzzer.off()
-                        time.sleep(0.05)
-                elif tone_type == 'start':
-                    # Start beep
-                    self.buzzer.on()
-                    time.sleep(0.3)
-                    self.buzzer.off()
-                elif tone_type == 'stop':
-                    # Stop beep
-                    self.buzzer.on()
-                    time.sleep(0.2)
-                    self.buzzer.off()
-                elif tone_type == 'error':
-                    # Error pattern - 3 quick beeps
-                    for _ in range(3):
-                        self.buzzer.on()
-                        time.sleep(0.1)
+                    else:
                         self.buzzer.off()
-                        time.sleep(0.1)
+                    time.sleep(duration)
+                self.buzzer.off()
             except Exception as e:
                 print(f"Buzzer error: {e}")
-        
-        # Run buzzer in separate thread to avoid blocking
-        threading.Thread(target=buzzer_thread, daemon=True).start()
+    
+    def build_speaker_tones(self):
+        """Pre-render the speaker fallback tones as raw 16-bit mono PCM."""
+        tones = {}
+        for tone_type, steps in self.TONE_PATTERNS.items():
+            samples = []
+            for freq, duration in steps:
+                t = np.arange(int(self.SPEAKER_RATE * duration)) / self.SPEAKER_RATE
+                samples.append(np.sin(2 * np.pi * freq * t) * 16000)
+            tones[tone_type] = np.concatenate(samples).astype(np.int16).tobytes()
+        return tones
     
     def play_speaker_tone(self, tone_type):
         """Fallback speaker tones when hardware buzzer not available."""
+        pcm = self.speaker_tones.get(tone_type)
+        if pcm is None:
+            return
+        
         try:
-            if tone_type == 'success':
-                subprocess.run(['speaker-test', '-t', 'sine', '-f', '1000', '-l', '1'], 
-                             capture_output=True, timeout=1)
-            elif tone_type == 'mismatch':
-                for _ in range(2):
-                    subprocess.run(['speaker-test', '-t', 'sine', '-f', '800', '-l', '1'], 
-                                 capture_output=True, timeout=1)
-                    time.sleep(0.1)
-            elif tone_type == 'no_barcode':
-                subprocess.run(['speaker-test', '-t', 'sine', '-f', '400', '-l', '1'], 
-                             capture_output=True, timeout=1)
-            elif tone_type == 'reference_captured':
-                for freq in [600, 800, 1000]:
-                    subprocess.run(['speaker-test', '-t', 'sine', '-f', str(freq), '-l', '1'], 
-                                 capture_output=True, timeout=1)
-                    time.sleep(0.05)
+            # Keep one aplay process open and stream the pre-rendered tones into it
+            if self.speaker_proc is None or self.speaker_proc.poll() is not None:
+                self.speaker_proc = subprocess.Popen(
+                    ['aplay', '-q', '-t', 'raw', '-f', 'S16_LE', '-c', '1', 
+                     '-r', str(self.SPEAKER_RATE)],
+                    stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, 
+                    stderr=subprocess.DEVNULL)
+            self.speaker_proc.stdin.write(pcm)
+            self.speaker_proc.stdin.flush()
         except Exception as e:
+            self.speaker_proc = None
             print(f"\\a")  # ASCII bell character as final fallback
     
     def handle_capture_button(self):
-        """Handle capture button press."""
+        """Handle capture button press (runs on the GPIO callback thread)."""
         print("\n[CAPTURE] Hardware button pressed - capturing reference...")
-        self.capture_requested = True
-        self.display_status("Capturing...", "Point at barcode")
+        self._event_q.put(('capture',))
     
     def handle_start_button(self):
-        """Handle start/stop button press."""
+        """Handle start/stop button press (runs on the GPIO callback thread)."""
+        self._event_q.put(('toggle_production',))
+    
+    def get_button_events(self):
+        """Return and clear all queued button events."""
+        events = []
+        while True:
+            try:
+                events.append(self._event_q.get_nowait())
+            except queue.Empty:
+                return events
+    
+    def process_button_events(self, frame, gray=None, enhanced=None):
+        """Handle queued button events on the main thread (the only LCD writer)."""
+        for event in self.get_button_events():
+            if event[0] == 'capture':
+                self.display_status("Capturing...", "Point at barcode")
+                self.capture_reference(frame, gray, enhanced)
+            elif event[0] == 'toggle_production':
+                self.toggle_production()
+    
+    def toggle_production(self):
+        """Start or pause production verification."""
         if not self.reference_barcode:
             self.display_status("No Reference!", "Press C first")
             self.play_buzzer_tone('error')
@@ -278,17 +444,101 @@ class HardwareBarcodeVerifier:
                 writer.writerow(['Timestamp', 'Status', 'Barcode', 'Reference', 'Type'])
             print(f"[OK] Log file created: {self.log_file}")
     
+    def rebuild_bin_log(self):
+        """Regenerate the binary log from the CSV if it is missing or stale.
+        
+        The CSV is the record of truth: it may predate the binary log, and
+        production_line_verifier_HARDWARE.py writes (and restarts) the same file
+        without touching the .bin. Its rows are mapped onto RESULT_CODES too.
+        """
+        if not os.path.exists(self.log_file):
+            return
+        if (os.path.exists(self.bin_log_file) and 
+                os.path.getmtime(self.bin_log_file) >= os.path.getmtime(self.log_file)):
+            return
+        
+        # Both scripts may have appended to one file, so map rows by position:
+        #   ours:    Timestamp, Status, Barcode, Reference, Type
+        #   theirs:  Timestamp, Action, Barcode, Type, Result, Details
+        records = []
+        with open(self.log_file, 'r', newline='') as f:
+            for row in csv.reader(f):
+                if len(row) < 2:
+                    continue
+                status = row[1]
+                if status == 'REFERENCE_CAPTURED':
+                    status = 'REFERENCE_SET'
+                elif status == 'VERIFICATION' and len(row) > 4:
+                    status = row[4]
+                code = RESULT_CODES.get(status)
+                if code is None:
+                    continue
+                try:
+                    timestamp = datetime.fromisoformat(row[0]).timestamp()
+                except ValueError:
+                    continue
+                records.append((timestamp, code))
+        
+        np.array(records, dtype=LOG_RECORD).tofile(self.bin_log_file)
+        print(f"[INFO] Rebuilt {self.bin_log_file} from {self.log_file} ({len(records)} results)")
+    
+    def open_log_files(self):
+        """Open the CSV (line-buffered) and binary logs for appending."""
+        if self._log_fh is None:
+            self.rebuild_bin_log()
+            self._log_fh = open(self.log_file, 'a', newline='', buffering=1)
+            self._log_writer = csv.writer(self._log_fh)
+            self._bin_log_fh = open(self.bin_log_file, 'ab')
+    
+    def sync_log_files(self):
+        """Flush both logs and force them to disk."""
+        for fh in (self._log_fh, self._bin_log_fh):
+            if fh is not None:
+                fh.flush()
+                os.fsync(fh.fileno())
+        self._unsynced = 0
+    
+    def close_log_files(self):
+        """Sync and close the log files."""
+        if self._log_fh is None:
+            return
+        self.sync_log_files()
+        self._log_fh.close()
+        self._bin_log_fh.close()
+        self._log_fh = self._log_writer = self._bin_log_fh = None
+    
     def log_result(self, status, barcode='', barcode_type=''):
-        """Log scan result to CSV file."""
-        with open(self.log_file, 'a', newline='') as f:
-            writer = csv.writer(f)
-            writer.writerow([
-                datetime.now().strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
-                status,
-                barcode,
-                self.reference_barcode or '',
-                barcode_type
-            ])
+        """Log scan result to CSV file (and its code to the binary log)."""
+        now = datetime.now()
+        self.open_log_files()
+        self._log_writer.writerow([
+            now.strftime('%Y-%m-%d %H:%M:%S.%f')[:-3],
+            status,
+            barcode,
+            self.reference_barcode or '',
+            barcode_type
+        ])
+        
+        code = RESULT_CODES.get(status)
+        if code is not None:
+            record = np.array([(now.timestamp(), code)], dtype=LOG_RECORD)
+            record.tofile(self._bin_log_fh)
+        
+        self._unsynced += 1
+        if self._unsynced >= self.LOG_SYNC_EVERY:
+            self.sync_log_files()
+    
+    def count_logged_results(self):
+        """Tally all results in the binary log; returns {status: count}."""
+        if self._bin_log_fh is not None:
+            self._bin_log_fh.flush()
+        else:
+            self.rebuild_bin_log()
+        if not os.path.exists(self.bin_log_file):
+            return {status: 0 for status in RESULT_CODES}
+        codes = np.fromfile(self.bin_log_file, dtype=LOG_RECORD)['code']
+        counts = count_result_codes(codes, len(RESULT_CODES))
+        return {status: int(counts[code]) for status, code in RESULT_CODES.items()}
     
     def preprocess_for_barcode(self, frame):
         """Enhanced preprocessing for barcode detection."""
@@ -319,8 +569,123 @@ class HardwareBarcodeVerifier:
         
         return results
     
-    def detect_barcode(self, frame):
-        """Enhanced barcode detection for all 1D barcode types."""
+    def equalize(self, gray):
+        """Histogram-equalize a grayscale image (same result as cv2.equalizeHist).
+        
+        Builds the LUT from the cumulative histogram with NumPy, reusing one
+        histogram buffer across frames.
+        """
+        hist = cv2.calcHist([gray], [0], None, [256], [0, 256], hist=self._eq_hist).ravel()
+        nonzero = np.flatnonzero(hist)
+        if nonzero.size == 0:
+            return gray
+        
+        cdf = np.cumsum(hist)
+        cdf_min = cdf[nonzero[0]]
+        if cdf[-1] == cdf_min:
+            # Single grey level - nothing to stretch
+            return gray
+        lut = np.rint((cdf - cdf_min) * 255 / (cdf[-1] - cdf_min)).clip(0, 255).astype(np.uint8)
+        self._eq_buf = self.reuse_buffer(self._eq_buf, gray.shape)
+        return cv2.LUT(gray, lut, dst=self._eq_buf)
+    
+    def to_gray(self, image):
+        """Convert a BGR image to grayscale into a reused buffer."""
+        self._gray_buf = self.reuse_buffer(self._gray_buf, image.shape[:2])
+        return cv2.cvtColor(image, cv2.COLOR_BGR2GRAY, dst=self._gray_buf)
+    
+    def reuse_buffer(self, buf, shape):
+        """Return buf if it is a uint8 array of this shape, else a new one."""
+        if buf is None or buf.shape != shape:
+            buf = np.empty(shape, np.uint8)
+        return buf
+    
+    def get_roi(self, frame):
+        """Return the scan region (x, y, w, h), clamped to the frame."""
+        height, width = frame.shape[:2]
+        if self.roi is None:
+            w = int(width * self.ROI_FRACTION)
+            h = int(height * self.ROI_FRACTION)
+            self.roi = ((width - w) // 2, (height - h) // 2, w, h)
+        
+        x, y, w, h = self.roi
+        x = max(0, min(x, width - 1))
+        y = max(0, min(y, height - 1))
+        return x, y, min(w, width - x), min(h, height - y)
+    
+    def crop_to_roi(self, frame):
+        """Return a zero-copy view of the scan region and its offset."""
+        x, y, w, h = self.get_roi(frame)
+        return frame[y:y + h, x:x + w], x, y
+    
+    def quick_decode(self, roi):
+        """Lightweight decode for the live view.
+        
+        Returns (barcodes, gray, enhanced); enhanced is None unless it was needed.
+        Outside production mode, an unchanged scene reuses the previous result.
+        """
+        gray = self.to_gray(roi)
+        
+        # Cheap scene fingerprint: 64x48 thumbnail, quantised against sensor noise
+        thumb = cv2.resize(gray, (64, 48), interpolation=cv2.INTER_AREA)
+        frame_hash = zlib.crc32((thumb >> 3).tobytes())
+        now = time.monotonic()
+        if (not self.production_mode and frame_hash == self._decode_hash and 
+                now - self._decode_hash_time < self.DECODE_CACHE_TTL):
+            return self._decode_cache, gray, None
+        
+        # Decode a single GRAY8 image; equalize only if that finds nothing
+        enhanced = None
+        barcodes = pyzbar.decode(gray, symbols=self.SYMBOLS)
+        if not barcodes:
+            # Apply basic enhancement
+            enhanced = self.equalize(gray)
+            barcodes = pyzbar.decode(enhanced, symbols=self.SYMBOLS)
+        
+        self._decode_hash = frame_hash
+        self._decode_hash_time = now
+        self._decode_cache = barcodes
+        return barcodes, gray, enhanced
+    
+    def map_barcodes(self, detections, dx=0, dy=0, scale=1.0):
+        """Shift then scale barcode locations (ROI -> frame -> display coordinates)."""
+        if not dx and not dy and scale == 1.0:
+            return detections
+        
+        mapped = []
+        for barcode, data in detections:
+            left, top, width, height = barcode.rect
+            rect = barcode.rect._replace(left=int((left + dx) * scale), 
+                                         top=int((top + dy) * scale), 
+                                         width=int(width * scale), 
+                                         height=int(height * scale))
+            points = np.asarray(barcode.polygon, np.int32).reshape(-1, 2)
+            polygon = map_points(points, dx, dy, scale, np.empty_like(points))
+            mapped.append((barcode._replace(rect=rect, polygon=polygon), data))
+        return mapped
+    
+    def decode_data(self, barcodes):
+        """Pair each barcode with its data string, decoded once per frame."""
+        detections = []
+        for barcode in barcodes:
+            try:
+                detections.append((barcode, barcode.data.decode('utf-8')))
+            except UnicodeDecodeError:
+                pass
+        return detections
+    
+    def detect_barcode(self, frame, gray=None, enhanced=None):
+        """Enhanced barcode detection for all 1D barcode types.
+        
+        gray/enhanced are optional grayscale and equalized versions of the
+        ROI crop, if the caller already computed them for this frame.
+        Returns a list of (barcode, data) tuples with the data already decoded.
+        """
+        roi, dx, dy = self.crop_to_roi(frame)
+        return self.map_barcodes(self._detect_barcode(roi, gray, enhanced), dx, dy)
+    
+    def _detect_barcode(self, frame, gray=None, enhanced=None):
+        """Run the detection stages on an already-cropped image."""
         all_barcodes = []
         seen_data = set()
         
@@ -329,30 +694,28 @@ class HardwareBarcodeVerifier:
                 data = barcode.data.decode('utf-8')
                 if data and data not in seen_data and len(data) > 0:
                     seen_data.add(data)
-                    all_barcodes.append(barcode)
+                    all_barcodes.append((barcode, data))
                     return True
             except:
                 pass
             return False
         
-        # STAGE 1: Quick attempts on original and grayscale
+        # STAGE 1: Quick attempts on grayscale
+        # (pyzbar reduces a BGR image to its first channel, so decoding the
+        # colour frame only scans the blue plane - gray is scanned instead)
         try:
-            # Try original color
-            barcodes = pyzbar.decode(frame)
-            for barcode in barcodes:
-                if add_unique_barcode(barcode):
-                    return all_barcodes
-            
             # Try grayscale
-            gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
-            barcodes = pyzbar.decode(gray)
+            if gray is None:
+                gray = self.to_gray(frame)
+            barcodes = pyzbar.decode(gray, symbols=self.SYMBOLS)
             for barcode in barcodes:
                 if add_unique_barcode(barcode):
                     return all_barcodes
             
             # Try enhanced
-            enhanced = cv2.equalizeHist(gray)
-            barcodes = pyzbar.decode(enhanced)
+            if enhanced is None:
+                enhanced = self.equalize(gray)
+            barcodes = pyzbar.decode(enhanced, symbols=self.SYMBOLS)
             for barcode in barcodes:
                 if add_unique_barcode(barcode):
                     return all_barcodes
@@ -360,12 +723,13 @@ class HardwareBarcodeVerifier:
             pass
         
         # STAGE 2: Try key preprocessing methods
-        gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+        if gray is None:
+            gray = self.to_gray(frame)
         
         try:
             # Otsu's thresholding
             _, otsu = cv2.threshold(gray, 0, 255, cv2.THRESH_BINARY + cv2.THRESH_OTSU)
-            barcodes = pyzbar.decode(otsu)
+            barcodes = pyzbar.decode(otsu, symbols=self.SYMBOLS)
             for barcode in barcodes:
                 if add_unique_barcode(barcode):
                     return all_barcodes
@@ -373,7 +737,7 @@ class HardwareBarcodeVerifier:
             # Adaptive thresholding
             adaptive = cv2.adaptiveThreshold(gray, 255, cv2.ADAPTIVE_THRESH_GAUSSIAN_C, 
                                             cv2.THRESH_BINARY, 11, 2)
-            barcodes = pyzbar.decode(adaptive)
+            barcodes = pyzbar.decode(adaptive, symbols=self.SYMBOLS)
             for barcode in barcodes:
                 if add_unique_barcode(barcode):
                     return all_barcodes
@@ -381,7 +745,7 @@ class HardwareBarcodeVerifier:
             # CLAHE
             clahe = cv2.createCLAHE(clipLimit=3.0, tileGridSize=(8,8))
             clahe_img = clahe.apply(gray)
-            barcodes = pyzbar.decode(clahe_img)
+            barcodes = pyzbar.decode(clahe_img, symbols=self.SYMBOLS)
             for barcode in barcodes:
                 if add_unique_barcode(barcode):
                     return all_barcodes
@@ -390,19 +754,19 @@ class HardwareBarcodeVerifier:
         
         return all_barcodes
     
-    def capture_reference(self, frame):
+    def capture_reference(self, frame, gray=None, enhanced=None):
         """Capture and store reference barcode from current frame."""
-        barcodes = self.detect_barcode(frame)
+        detections = self.detect_barcode(frame, gray, enhanced)
         
-        if not barcodes:
+        if not detections:
             print("[ERROR] No barcode detected! Please position product correctly and try again.")
             self.display_status("No Barcode!", "Try again")
             self.play_buzzer_tone('no_barcode')
             return False
         
         # Take the first detected barcode as reference
-        barcode = barcodes[0]
-        self.reference_barcode = barcode.data.decode('utf-8')
+        barcode, data = detections[0]
+        self.reference_barcode = data
         self.reference_type = barcode.type
         
         print("\n" + "=" * 60)
@@ -420,12 +784,12 @@ class HardwareBarcodeVerifier:
         
         return True
     
-    def verify_product(self, frame):
+    def verify_product(self, frame, gray=None, enhanced=None):
         """Verify product barcode against reference."""
         if not self.reference_barcode:
             return None
         
-        current_time = time.time()
+        current_time = time.monotonic()
         
         # Check if enough time has passed since last scan (throttling)
         if current_time - self.last_scan_time < self.scan_interval:
@@ -434,11 +798,11 @@ class HardwareBarcodeVerifier:
         self.last_scan_time = current_time
         
         # Detect barcodes
-        barcodes = self.detect_barcode(frame)
+        detections = self.detect_barcode(frame, gray, enhanced)
         
         self.stats['total_scans'] += 1
         
-        if not barcodes:
+        if not detections:
             # No barcode detected
             self.stats['no_barcode'] += 1
             print(f"\n[ALERT] NO BARCODE DETECTED (Scan #{self.stats['total_scans']})")
@@ -448,8 +812,7 @@ class HardwareBarcodeVerifier:
             return 'NO_BARCODE'
         
         # Check first barcode
-        barcode = barcodes[0]
-        detected_barcode = barcode.data.decode('utf-8')
+        barcode, detected_barcode = detections[0]
         detected_type = barcode.type
         
         if detected_barcode == self.reference_barcode:
@@ -471,37 +834,40 @@ class HardwareBarcodeVerifier:
             self.play_buzzer_tone('mismatch')
             return 'MISMATCH'
     
-    def draw_overlay(self, frame, barcodes):
+    def get_display_buffer(self, frame):
+        """Copy frame into the persistent display buffer and return the buffer."""
+        if frame is self._display_buf:
+            return frame
+        if self._display_buf is None or self._display_buf.shape != frame.shape:
+            self._display_buf = np.empty_like(frame)
+        np.copyto(self._display_buf, frame)
+        return self._display_buf
+    
+    def draw_overlay(self, frame, detections):
         """Draw detection overlay on frame."""
-        display = frame.copy()
+        display = self.get_display_buffer(frame)
         
         # Draw barcodes
-        for barcode in barcodes:
+        for barcode, data in detections:
             # Get barcode location
             points = barcode.polygon
             if len(points) == 4:
-                pts = [(point.x, point.y) for point in points]
-                pts = np.array(pts, dtype=np.int32)
+                pts = self._poly_scratch[:4]
+                pts[:] = points
                 
-                # Determine color based on status
+                # Determine status (and its color)
                 if self.reference_barcode:
-                    detected_data = barcode.data.decode('utf-8')
-                    if detected_data == self.reference_barcode:
-                        color = (0, 255, 0)  # Green for match
-                        status = "MATCH"
-                    else:
-                        color = (0, 0, 255)  # Red for mismatch
-                        status = "MISMATCH"
+                    status = "MATCH" if data == self.reference_barcode else "MISMATCH"
                 else:
-                    color = (255, 255, 0)  # Yellow for reference mode
                     status = "DETECTED"
+                color = self.OVERLAY_COLORS[status]
                 
                 # Draw polygon
                 cv2.polylines(display, [pts], True, color, 3)
                 
                 # Draw barcode data
                 x, y = barcode.rect.left, barcode.rect.top
-                text = f"{barcode.data.decode('utf-8')} ({barcode.type})"
+                text = f"{data} ({barcode.type})"
                 cv2.putText(display, text, (x, y - 30), 
                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, color, 2)
                 cv2.putText(display, status, (x, y - 10), 
@@ -511,25 +877,88 @@ class HardwareBarcodeVerifier:
     
     def draw_status_panel(self, frame):
         """Draw status information panel on frame."""
-        display = frame.copy()
+        # Draws in place if frame is already the display buffer
+        display = self.get_display_buffer(frame)
         height, width = display.shape[:2]
         
-        # Create semi-transparent panel
-        overlay = display.copy()
-        cv2.rectangle(overlay, (0, 0), (width, 220), (0, 0, 0), -1)
-        cv2.addWeighted(overlay, 0.7, display, 0.3, 0, display)
+        # Re-render the panel only when something it shows has changed
+        state_hash = (width, self.reference_barcode, self.reference_type, 
+                      self.production_mode, self.stats['total_scans'], 
+                      self.stats['passed'], self.stats['mismatched'], 
+                      self.stats['no_barcode'], self.hardware_available)
+        if state_hash != self._panel_hash:
+            # Lay out at full camera width, then shrink once to display size
+            scale = self.display_scale
+            header, footer = self.render_status_panel(round(width / scale))
+            if scale != 1.0:
+                header = cv2.resize(header, (width, round(self.PANEL_HEIGHT * scale)), 
+                                    interpolation=cv2.INTER_AREA)
+                footer = cv2.resize(footer, (width, round(self.FOOTER_HEIGHT * scale)), 
+                                    interpolation=cv2.INTER_AREA)
+            # Text pixels, so only the lettering is stamped over the live view
+            self._panel_cache = (header, header.any(axis=2, keepdims=True), 
+                                 footer, footer.any(axis=2, keepdims=True))
+            self._panel_hash = state_hash
+        
+        header, header_mask, footer, footer_mask = self._panel_cache
+        
+        # Semi-transparent header: darken the band to 30%, then draw the text
+        band = display[:header.shape[0]]
+        cv2.convertScaleAbs(band, dst=band, alpha=0.3)
+        np.copyto(band, header, where=header_mask)
+        
+        # Controls text sits directly on the frame
+        np.copyto(display[height - footer.shape[0]:], footer, where=footer_mask)
+        
+        # Scan region guide (self.roi is in camera-frame coordinates)
+        if self.roi is not None:
+            x, y, w, h = (int(v * self.display_scale) for v in self.roi)
+            cv2.rectangle(display, (x, y), (x + w, y + h), (255, 255, 255), 1)
+        
+        return display
+    
+    def render_panel_background(self, width):
+        """Render the fixed parts of the header and footer (cached per width)."""
+        bg_key = (width, self.hardware_available)
+        if self._panel_bg_key == bg_key:
+            return self._panel_bg
+        
+        header = np.zeros((self.PANEL_HEIGHT, width, 3), dtype=np.uint8)
+        footer = np.zeros((self.FOOTER_HEIGHT, width, 3), dtype=np.uint8)
         
         # Title
-        cv2.putText(display, "BARCODE VERIFIER - HARDWARE ENHANCED", 
+        cv2.putText(header, "BARCODE VERIFIER - HARDWARE ENHANCED", 
                    (20, 40), cv2.FONT_HERSHEY_SIMPLEX, 0.8, (0, 255, 255), 2)
         
+        # Hardware status
+        hw_status = "HARDWARE: ON" if self.hardware_available else "HARDWARE: OFF"
+        cv2.putText(header, hw_status, (20, 210), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (150, 150, 150), 1)
+        
+        # Controls (baseline 30 px above the bottom of the frame)
+        if self.hardware_available:
+            controls_text = "GPIO22=Capture | GPIO27=Start/Stop | Q=Quit | H=Help"
+        else:
+            controls_text = "C=Capture | S=Start/Stop | R=Reset | L=Logs | Q=Quit"
+        cv2.putText(footer, controls_text, (20, self.FOOTER_HEIGHT - 30), 
+                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 2)
+        
+        self._panel_bg = (header, footer)
+        self._panel_bg_key = bg_key
+        return self._panel_bg
+    
+    def render_status_panel(self, width):
+        """Render the header panel and controls footer as standalone images."""
+        header_bg, footer = self.render_panel_background(width)
+        header = header_bg.copy()
+        
         # Reference barcode status
         if self.reference_barcode:
             ref_text = f"Reference: {self.reference_barcode} ({self.reference_type})"
-            cv2.putText(display, ref_text, (20, 80), 
+            cv2.putText(header, ref_text, (20, 80), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 0), 2)
         else:
-            cv2.putText(display, "Reference: NOT SET - Press 'C' or GPIO22 to capture", 
+            cv2.putText(header, "Reference: NOT SET - Press 'C' or GPIO22 to capture", 
                        (20, 80), cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 255), 2)
         
         # Production mode status
@@ -539,36 +968,22 @@ class HardwareBarcodeVerifier:
         else:
             mode_text = "Mode: STANDBY - Press 'S' or GPIO27 to start"
             mode_color = (255, 255, 0)
-        cv2.putText(display, mode_text, (20, 115), 
+        cv2.putText(header, mode_text, (20, 115), 
                    cv2.FONT_HERSHEY_SIMPLEX, 0.7, mode_color, 2)
         
         # Statistics
         stats_text = f"Scans: {self.stats['total_scans']} | Pass: {self.stats['passed']} | Mismatch: {self.stats['mismatched']} | No Barcode: {self.stats['no_barcode']}"
-        cv2.putText(display, stats_text, (20, 150), 
+        cv2.putText(header, stats_text, (20, 150), 
                    cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
         
         # Performance
         if self.stats['total_scans'] > 0:
             pass_rate = (self.stats['passed'] / self.stats['total_scans']) * 100
             perf_text = f"Pass Rate: {pass_rate:.1f}%"
-            cv2.putText(display, perf_text, (20, 180), 
+            cv2.putText(header, perf_text, (20, 180), 
                        cv2.FONT_HERSHEY_SIMPLEX, 0.6, (255, 255, 255), 2)
         
-        # Hardware status
-        hw_status = "HARDWARE: ON" if self.hardware_available else "HARDWARE: OFF"
-        cv2.putText(display, hw_status, (20, 210), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.5, (150, 150, 150), 1)
-        
-        # Controls
-        controls_y = height - 30
-        if self.hardware_available:
-            controls_text = "GPIO22=Capture | GPIO27=Start/Stop | Q=Quit | H=Help"
-        else:
-            controls_text = "C=Capture | S=Start/Stop | R=Reset | L=Logs | Q=Quit"
-        cv2.putText(display, controls_text, (20, controls_y), 
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.6, (200, 200, 200), 2)
-        
-        return display
+        return header, footer
     
     def print_statistics(self):
         """Print session statistics."""
@@ -599,6 +1014,11 @@ class HardwareBarcodeVerifier:
                     print("-" * 60)
                     for line in lines[-20:]:
                         print(line.strip())
+            
+            totals = self.count_logged_results()
+            print("-" * 60)
+            print(f"ALL-TIME TOTALS ({self.log_file}): " + " | ".join(f"{status}: {count}" 
+                                                  for status, count in totals.items()))
         except Exception as e:
             print(f"Error reading log file: {e}")
         
@@ -616,6 +1036,18 @@ class HardwareBarcodeVerifier:
                 if hasattr(self, 'start_button'):
                     self.start_button.close()
             
+            self.close_log_files()
+            
+            # A stuck aplay must not stop the LCD from being shut down
+            if self.speaker_proc is not None:
+                try:
+                    self.speaker_proc.stdin.close()
+                    self.speaker_proc.wait(timeout=2)
+                except (OSError, subprocess.TimeoutExpired):
+                    self.speaker_proc.kill()
+                    self.speaker_proc.wait()
+                self.speaker_proc = None
+            
             if self.lcd:
                 self.lcd.clear()
                 self.lcd.write_string("System Offline")
@@ -626,6 +1058,171 @@ class HardwareBarcodeVerifier:
         except Exception as e:
             print(f"Cleanup error: {e}")
     
+    def open_gstreamer_camera(self):
+        """Open /dev/video0 through GStreamer; None if unavailable."""
+        if not sys.platform.startswith('linux') or not os.path.exists('/dev/video0'):
+            return None
+        
+        test_cap = cv2.VideoCapture(self.GST_PIPELINE, cv2.CAP_GSTREAMER)
+        if test_cap.isOpened():
+            ret, frame = test_cap.read()
+            if ret and frame is not None:
+                return test_cap
+        test_cap.release()
+        print("[INFO] GStreamer camera pipeline unavailable - probing other sources")
+        return None
+    
+    def probe_camera_source(self, source):
+        """Open a camera source and return it if it delivers a frame, else None."""
+        # Cheap TCP check first - a dead HTTP stream would block VideoCapture for seconds
+        if isinstance(source, str) and source.startswith('http'):
+            url = urlparse(source)
+            try:
+                socket.create_connection((url.hostname, url.port or 80), timeout=0.5).close()
+            except OSError:
+                return None
+        
+        test_cap = cv2.VideoCapture(source)
+        if test_cap.isOpened():
+            ret, frame = test_cap.read()
+            if ret and frame is not None:
+                return test_cap
+        test_cap.release()
+        return None
+    
+    def find_camera(self, camera_sources):
+        """Probe all camera sources in parallel; return the first working one in list order.
+        
+        Probes run concurrently, but results are taken in camera_sources order,
+        so a success only wins once every earlier-listed source has failed.
+        """
+        def release_unused(future):
+            if future.cancelled() or future.exception() is not None:
+                return
+            unused_cap = future.result()
+            if unused_cap is not None:
+                unused_cap.release()
+        
+        executor = ThreadPoolExecutor(max_workers=8)
+        futures = [executor.submit(self.probe_camera_source, source) 
+                   for source in camera_sources]
+        cap = None
+        camera_source = None
+        winner = None
+        try:
+            for index, future in enumerate(futures):
+                try:
+                    test_cap = future.result()
+                except Exception as e:
+                    print(f"Camera probe error ({camera_sources[index]}): {e}")
+                    continue
+                if test_cap is not None:
+                    cap = test_cap
+                    camera_source = camera_sources[index]
+                    winner = index
+                    break
+        finally:
+            # Don't wait for later (lower-priority) probes; release whatever they open
+            executor.shutdown(wait=False, cancel_futures=True)
+            for index, future in enumerate(futures):
+                if index != winner:
+                    future.add_done_callback(release_unused)
+        
+        return cap, camera_source
+    
+    def _cmd_quit(self, frame, gray, enhanced):
+        """'q' - stop the main loop."""
+        print("\n[SHUTDOWN] Shutting down system...")
+        return True
+    
+    def _cmd_capture(self, frame, gray, enhanced):
+        """'c' - capture the reference barcode from the current frame."""
+        print("\n[CAPTURE] Capturing reference barcode...")
+        self.capture_reference(frame, gray, enhanced)
+    
+    def _cmd_start(self, frame, gray, enhanced):
+        """'s' - start/stop production verification."""
+        self.toggle_production()
+    
+    def _cmd_reset(self, frame, gray, enhanced):
+        """'r' - clear the reference barcode."""
+        print("\n[RESET] Resetting reference barcode...")
+        self.reference_barcode = None
+        self.reference_type = None
+        self.production_mode = False
+        self.display_status("Reference Reset", "Press C to set new")
+        print("[OK] Reference barcode cleared. Press 'C' to set new reference.")
+    
+    def _cmd_logs(self, frame, gray, enhanced):
+        """'l' - show recent log entries."""
+        self.view_logs()
+    
+    def _cmd_help(self, frame, gray, enhanced):
+        """'h' - print the controls and detection tips."""
+        print("\n" + "=" * 60)
+        print("HELP - CONTROLS")
+        print("=" * 60)
+        if self.hardware_available:
+            print("HARDWARE CONTROLS:")
+            print(f"GPIO {self.CAPTURE_BTN_PIN} - Capture reference barcode")
+            print(f"GPIO {self.START_BTN_PIN} - Start/Stop production verification")
+            print(f"GPIO {self.BUZZER_PIN} - Buzzer feedback")
+            print("I2C LCD - Status display")
+            print("=" * 60)
+        print("KEYBOARD CONTROLS:")
+        print("C - Capture reference barcode")
+        print("S - Start/Stop production verification")
+        print("R - Reset reference barcode")
+        print("L - View recent logs")
+        print("H - Show this help")
+        print("Q - Quit system")
+        print("\nBARCODE DETECTION TIPS:")
+        print("- Use good, even lighting (avoid shadows)")
+        print("- Hold barcode flat and parallel to camera")
+        print("- Keep barcode at 15-30 cm distance")
+        print("- Avoid glare on barcode surface")
+        print("- Try rotating slightly if not detecting")
+        print("=" * 60)
+    
+    def start_grabber(self, cap):
+        """Start the capture thread that keeps only the newest frame."""
+        self._latest_frame = None
+        self._frame_lock = threading.Lock()
+        self._frame_ready = threading.Event()
+        self._grabber_stop = threading.Event()
+        self._grabber_thread = threading.Thread(target=self._grabber, args=(cap,), 
+                                                daemon=True)
+        self._grabber_thread.start()
+    
+    def _grabber(self, cap):
+        """Capture thread - overwrite the 1-slot mailbox with every new frame."""
+        while not self._grabber_stop.is_set():
+            ret, frame = cap.read()
+            with self._frame_lock:
+                # On failure, wake the main loop with an empty slot
+                self._latest_frame = frame if ret else None
+                self._frame_ready.set()
+            if not ret:
+                break
+    
+    def get_latest_frame(self, timeout=2.0):
+        """Take the newest captured frame, waiting for one if the slot is empty.
+        
+        Returns None if the camera stopped delivering frames.
+        """
+        if not self._frame_ready.wait(timeout):
+            return None
+        with self._frame_lock:
+            frame = self._latest_frame
+            self._latest_frame = None
+            self._frame_ready.clear()
+        return frame
+    
+    def stop_grabber(self):
+        """Stop the capture thread before the camera is released."""
+        self._grabber_stop.set()
+        self._grabber_thread.join(timeout=1.0)
+    
     def run(self):
         """Main loop - run the verification system."""
         print("\n" + "=" * 60)
@@ -633,9 +1230,6 @@ class HardwareBarcodeVerifier:
         print("=" * 60)
         
         # Initialize camera - try different sources including phone camera
-        cap = None
-        camera_source = None
-        
         # Try different camera sources
         camera_sources = [
             # Local USB cameras
@@ -655,20 +1249,13 @@ class HardwareBarcodeVerifier:
         ]
         
         print("Searching for cameras...")
-        for source in camera_sources:
-            print(f"Trying camera source: {source}")
-            test_cap = cv2.VideoCapture(source)
-            if test_cap.isOpened():
-                ret, frame = test_cap.read()
-                if ret and frame is not None:
-                    print(f"[OK] Camera found: {source}")
-                    cap = test_cap
-                    camera_source = source
-                    break
-                else:
-                    test_cap.release()
-            else:
-                test_cap.release()
+        # Prefer GStreamer on the Pi - single-frame appsink, no V4L2 buffering
+        cap = self.open_gstreamer_camera()
+        camera_source = "gstreamer"
+        if cap is None:
+            cap, camera_source = self.find_camera(camera_sources)
+        if cap is not None:
+            print(f"[OK] Camera found: {camera_source}")
         
         if cap is None:
             print("[ERROR] Could not find any working camera!")
@@ -689,13 +1276,21 @@ class HardwareBarcodeVerifier:
             return
         
         # Set camera properties for maximum performance
-        cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
-        cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
-        cap.set(cv2.CAP_PROP_FPS, 30)
-        cap.set(cv2.CAP_PROP_BUFFERSIZE, 1)  # Reduce buffer for lower latency
-        cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))  # Use MJPG for better performance
+        # (the GStreamer pipeline already fixes format, size and buffering)
+        if camera_source != "gstreamer":
+            # FOURCC first - changing the format can reallocate the driver buffers
+            cap.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*'MJPG'))  # Use MJPG for better performance
+            cap.set(cv2.CAP_PROP_FRAME_WIDTH, 1280)
+            cap.set(cv2.CAP_PROP_FRAME_HEIGHT, 720)
+            cap.set(cv2.CAP_PROP_FPS, 30)
+            # Single-frame buffer so every read returns the freshest frame
+            if not cap.set(cv2.CAP_PROP_BUFFERSIZE, 1):
+                print("[WARNING] Camera backend ignored CAP_PROP_BUFFERSIZE=1 - "
+                      "frames may lag behind the line")
         
         print("[OK] Camera initialized successfully!")
+        if self.headless:
+            print("[INFO] No display detected - running headless (hardware controls only)")
         self.display_status("Camera Ready", "Press C to start")
         
         print("\nINSTRUCTIONS:")
@@ -727,113 +1322,160 @@ class HardwareBarcodeVerifier:
         
         signal.signal(signal.SIGINT, signal_handler)
         
+        # Capture runs on its own thread; the loop always takes the newest frame
+        self.start_grabber(cap)
+        
+        # Monotonic schedule for the periodic jobs (UI repaint, production scan)
+        next_ui_at = time.monotonic()
+        
         try:
             while True:
-                ret, frame = cap.read()
-                if not ret:
+                # Sleep until the next job is due instead of processing every frame
+                now = time.monotonic()
+                next_due = next_ui_at
+                if self.production_mode and self.reference_barcode:
+                    next_due = min(next_due, self.last_scan_time + self.scan_interval)
+                if next_due > now:
+                    time.sleep(next_due - now)
+                
+                frame = self.get_latest_frame()
+                if frame is None:
                     print("[ERROR] Could not read from camera!")
                     break
                 
-                # Handle capture request from hardware button
-                if self.capture_requested:
-                    if self.capture_reference(frame):
-                        self.capture_requested = False
-                    else:
-                        self.capture_requested = False
+                # UI repaint is due at most every ui_interval; never without a monitor
+                ui_due = time.monotonic() >= next_ui_at
+                if ui_due:
+                    next_ui_at = time.monotonic() + self.ui_interval
+                render = ui_due and not self.headless
                 
-                # Always detect barcodes for visual feedback
-                # Use lightweight detection for display
-                gray = cv2.cvtColor(frame, cv2.COLOR_BGR2GRAY)
+                # Gray/equalized ROI images computed for display are shared with
+                # capture and verification so each conversion runs once per frame
+                gray = None
+                enhanced = None
                 
-                # Apply basic enhancement
-                enhanced = cv2.equalizeHist(gray)
+                if render:
+                    # Always detect barcodes for visual feedback
+                    # Use lightweight detection for display, on the scan region only
+                    roi, roi_x, roi_y = self.crop_to_roi(frame)
+                    barcodes, gray, enhanced = self.quick_decode(roi)
                 
-                # Try multiple quick methods for display
-                barcodes = pyzbar.decode(frame)
-                if not barcodes:
-                    barcodes = pyzbar.decode(gray)
-                if not barcodes:
-                    barcodes = pyzbar.decode(enhanced)
+                # Handle hardware button presses queued since the last frame
+                self.process_button_events(frame, gray, enhanced)
+                
+                # Production mode - automatic verification (throttled by scan_interval)
+                if self.production_mode and self.reference_barcode:
+                    self.verify_product(frame, gray, enhanced)
+                
+                # Everything below is the UI repaint
+                if not render:
+                    continue
+                
+                # Render at display resolution; frame stays full-size and clean for capture
+                display_frame = frame
+                if self.display_scale != 1.0:
+                    # Nearest-neighbour: no filter arithmetic, fine for a preview
+                    display_frame = cv2.resize(frame, None, fx=self.display_scale, 
+                                               fy=self.display_scale, 
+                                               interpolation=cv2.INTER_NEAREST)
+                detections = self.map_barcodes(self.decode_data(barcodes), 
+                                               roi_x, roi_y, self.display_scale)
                 
                 # Draw barcode overlays
-                if barcodes:
-                    frame = self.draw_overlay(frame, barcodes)
+                if detections:
+                    display_frame = self.draw_overlay(display_frame, detections)
                 
                 # Draw status panel
-                display_frame = self.draw_status_panel(frame)
-                
-                # Production mode - automatic verification
-                if self.production_mode and self.reference_barcode:
-                    self.verify_product(frame)
+                display_frame = self.draw_status_panel(display_frame)
                 
                 # Display frame
                 cv2.imshow('Barcode Verifier - Hardware Enhanced', display_frame)
                 
-                # Handle keyboard input
-                key = cv2.waitKey(1) & 0xFF
+                # Handle keyboard input (pollKey pumps GUI events without waitKey's 1 ms sleep)
+                key = self.poll_key() & 0xFF
                 
-                if key == ord('q'):
-                    print("\n[SHUTDOWN] Shutting down system...")
+                handler = self._keymap.get(key)
+                if handler and handler(frame, gray, enhanced):
                     break
-                
-                elif key == ord('c'):
-                    print("\n[CAPTURE] Capturing reference barcode...")
-                    self.capture_reference(frame)
-                
-                elif key == ord('s'):
-                    self.handle_start_button()
-                
-                elif key == ord('r'):
-                    print("\n[RESET] Resetting reference barcode...")
-                    self.reference_barcode = None
-                    self.reference_type = None
-                    self.production_mode = False
-                    self.display_status("Reference Reset", "Press C to set new")
-                    print("[OK] Reference barcode cleared. Press 'C' to set new reference.")
-                
-                elif key == ord('l'):
-                    self.view_logs()
-                
-                elif key == ord('h'):
-                    print("\n" + "=" * 60)
-                    print("HELP - CONTROLS")
-                    print("=" * 60)
-                    if self.hardware_available:
-                        print("HARDWARE CONTROLS:")
-                        print(f"GPIO {self.CAPTURE_BTN_PIN} - Capture reference barcode")
-                        print(f"GPIO {self.START_BTN_PIN} - Start/Stop production verification")
-                        print(f"GPIO {self.BUZZER_PIN} - Buzzer feedback")
-                        print("I2C LCD - Status display")
-                        print("=" * 60)
-                    print("KEYBOARD CONTROLS:")
-                    print("C - Capture reference barcode")
-                    print("S - Start/Stop production verification")
-                    print("R - Reset reference barcode")
-                    print("L - View recent logs")
-                    print("H - Show this help")
-                    print("Q - Quit system")
-                    print("\nBARCODE DETECTION TIPS:")
-                    print("- Use good, even lighting (avoid shadows)")
-                    print("- Hold barcode flat and parallel to camera")
-                    print("- Keep barcode at 15-30 cm distance")
-                    print("- Avoid glare on barcode surface")
-                    print("- Try rotating slightly if not detecting")
-                    print("=" * 60)
         
         except KeyboardInterrupt:
             print("\n[SHUTDOWN] System interrupted by user...")
         except Exception as e:
             print(f"[ERROR] Unexpected error: {e}")
         finally:
-            # Cleanup
+            # Cleanup (hardware and logs are released even if the camera teardown fails)
             self.print_statistics()
-            cap.release()
-            cv2.destroyAllWindows()
-            self.cleanup()
+            try:
+                self.stop_grabber()
+                cap.release()
+                if not self.headless:
+                    cv2.destroyAllWindows()
+            finally:
+                self.cleanup()
             
             print("\n[OK] System shutdown complete!")
             print(f"Full logs saved to: {self.log_file}")
     
+    def read_command(self, timeout):
+        """Read one line from the console, waiting at most timeout seconds.
+        
+        Returns the stripped, lower-cased line, or None if nothing was entered.
+        """
+        if os.name == 'nt':
+            deadline = time.monotonic() + timeout
+            while True:
+                while msvcrt.kbhit():
+                    char = msvcrt.getwche()
+                    if char in '\r\n':
+                        print()
+                        line, self._console_line = self._console_line, ''
+                        return line.strip().lower()
+                    elif char == '\b':
+                        self._console_line = self._console_line[:-1]
+                    else:
+                        self._console_line += char
+                if time.monotonic() >= deadline:
+                    return None
+                time.sleep(0.01)
+        
+        # Read the raw fd so lines typed ahead are not hidden in sys.stdin's buffer
+        if '\n' not in self._console_line:
+            readable, _, _ = select.select([sys.stdin], [], [], timeout)
+            if not readable:
+                return None
+            chunk = os.read(sys.stdin.fileno(), 1024)
+            if not chunk:
+                return 'q'  # stdin closed
+            self._console_line += chunk.decode(errors='replace')
+            if '\n' not in self._console_line:
+                return None
+        line, self._console_line = self._console_line.split('\n', 1)
+        return line.strip().lower()
+    
+    def simulate_demo_scan(self, current_barcode):
+        """Simulate one production verification against the demo barcode."""
+        self.stats['total_scans'] += 1
+        if current_barcode == "NO_BARCODE":
+            self.stats['no_barcode'] += 1
+            print(f"[ALERT] NO BARCODE DETECTED (Demo Scan #{self.stats['total_scans']})")
+            self.display_status("NO BARCODE", f"Demo Scan #{self.stats['total_scans']}")
+            self.log_result('NO_BARCODE', '', '')
+            self.play_buzzer_tone('no_barcode')
+        elif current_barcode == self.reference_barcode:
+            self.stats['passed'] += 1
+            print(f"[PASS] (Demo Scan #{self.stats['total_scans']}): {current_barcode}")
+            self.display_status("PASS", f"Demo Scan #{self.stats['total_scans']}")
+            self.log_result('PASS', current_barcode, 'EAN13')
+            self.play_buzzer_tone('success')
+        else:
+            self.stats['mismatched'] += 1
+            print(f"[ALERT] BARCODE MISMATCH (Demo Scan #{self.stats['total_scans']})")
+            print(f"   Expected: {self.reference_barcode}")
+            print(f"   Found:    {current_barcode}")
+            self.display_status("MISMATCH!", f"Expected: {self.reference_barcode}")
+            self.log_result('MISMATCH', current_barcode, 'EAN13')
+            self.play_buzzer_tone('mismatch')
+    
     def run_demo_mode(self):
         """Run in demo mode when no camera is available."""
         print("\n" + "=" * 60)
@@ -862,6 +1504,10 @@ class HardwareBarcodeVerifier:
         ]
         current_demo_index = 0
         
+        # Hardware button presses act like their keyboard commands
+        button_commands = {'capture': 'c', 'toggle_production': 's'}
+        pending_commands = []
+        
         # Set up signal handler for graceful shutdown
         def signal_handler(sig, frame):
             print("\n[SHUTDOWN] Shutting down demo mode...")
@@ -870,87 +1516,81 @@ class HardwareBarcodeVerifier:
         
         signal.signal(signal.SIGINT, signal_handler)
         
+        scan_period = 1.0  # Simulated scan interval
+        next_scan_at = time.monotonic() + scan_period
+        show_prompt = True
+        
         try:
             while True:
-                print(f"\nCurrent demo barcode: {demo_barcodes[current_demo_index]}")
-                print("Commands: C=Capture Ref, S=Start Demo, R=Reset, L=Logs, Q=Quit, N=Next Barcode")
+                if show_prompt:
+                    print(f"\nCurrent demo barcode: {demo_barcodes[current_demo_index]}")
+                    print("Commands: C=Capture Ref, S=Start Demo, R=Reset, L=Logs, Q=Quit, N=Next Barcode")
+                    print("Enter command: ", end='', flush=True)
+                    show_prompt = False
                 
-                try:
-                    command = input("Enter command: ").strip().lower()
-                    
-                    if command == 'q':
-                        break
-                    elif command == 'c':
-                        if demo_barcodes[current_demo_index] != "NO_BARCODE":
-                            self.reference_barcode = demo_barcodes[current_demo_index]
-                            self.reference_type = "EAN13"
-                            print(f"\n[SUCCESS] REFERENCE CAPTURED: {self.reference_barcode}")
-                            self.display_status("Reference Set!", f"Demo: {self.reference_barcode}")
-                            self.log_result('REFERENCE_SET', self.reference_barcode, self.reference_type)
-                            self.play_buzzer_tone('reference_captured')
-                        else:
-                            print("[ERROR] Cannot capture reference from NO_BARCODE")
-                            self.play_buzzer_tone('no_barcode')
-                    elif command == 's':
-                        if not self.reference_barcode:
-                            print("[WARNING] No reference set! Press 'C' first.")
-                            self.play_buzzer_tone('no_barcode')
-                        else:
-                            self.production_mode = not self.production_mode
-                            if self.production_mode:
-                                print(f"\n[START] DEMO PRODUCTION MODE STARTED")
-                                print(f"Reference: {self.reference_barcode}")
-                                self.display_status("Demo Production ON", f"Ref: {self.reference_barcode}")
-                                self.play_buzzer_tone('start')
-                            else:
-                                print("\n[PAUSE] DEMO PRODUCTION MODE PAUSED")
-                                self.display_status("Demo Production OFF", "Press S to start")
-                                self.play_buzzer_tone('stop')
-                    elif command == 'r':
-                        self.reference_barcode = None
-                        self.reference_type = None
-                        self.production_mode = False
-                        self.display_status("Reference Reset", "Press C to set new")
-                        print("[OK] Reference reset")
-                    elif command == 'l':
-                        self.view_logs()
-                    elif command == 'n':
-                        current_demo_index = (current_demo_index + 1) % len(demo_barcodes)
-                        print(f"Switched to: {demo_barcodes[current_demo_index]}")
-                    else:
-                        print("Invalid command. Use: C, S, R, L, Q, N")
-                    
+                pending_commands.extend(button_commands[event[0]] 
+                                        for event in self.get_button_events())
+                if pending_commands:
+                    command = pending_commands.pop(0)
+                else:
+                    # Wait for input until the next simulated scan (short slices keep buttons live)
+                    remaining = next_scan_at - time.monotonic()
+                    timeout = min(max(remaining, 0), 0.1) if self.production_mode else 0.1
+                    command = self.read_command(timeout)
+                
+                if command is None:
                     # Simulate production verification if in production mode
-                    if self.production_mode and self.reference_barcode:
-                        current_barcode = demo_barcodes[current_demo_index]
-                        if current_barcode == "NO_BARCODE":
-                            self.stats['total_scans'] += 1
-                            self.stats['no_barcode'] += 1
-                            print(f"[ALERT] NO BARCODE DETECTED (Demo Scan #{self.stats['total_scans']})")
-                            self.display_status("NO BARCODE", f"Demo Scan #{self.stats['total_scans']}")
-                            self.log_result('NO_BARCODE', '', '')
-                            self.play_buzzer_tone('no_barcode')
-                        elif current_barcode == self.reference_barcode:
-                            self.stats['total_scans'] += 1
-                            self.stats['passed'] += 1
-                            print(f"[PASS] (Demo Scan #{self.stats['total_scans']}): {current_barcode}")
-                            self.display_status("PASS", f"Demo Scan #{self.stats['total_scans']}")
-                            self.log_result('PASS', current_barcode, 'EAN13')
-                            self.play_buzzer_tone('success')
-                        else:
-                            self.stats['total_scans'] += 1
-                            self.stats['mismatched'] += 1
-                            print(f"[ALERT] BARCODE MISMATCH (Demo Scan #{self.stats['total_scans']})")
-                            print(f"   Expected: {self.reference_barcode}")
-                            print(f"   Found:    {current_barcode}")
-                            self.display_status("MISMATCH!", f"Expected: {self.reference_barcode}")
-                            self.log_result('MISMATCH', current_barcode, 'EAN13')
-                            self.play_buzzer_tone('mismatch')
-                        
-                        time.sleep(1)  # Simulate scan interval
-                        
-                except KeyboardInterrupt:
+                    if time.monotonic() >= next_scan_at:
+                        next_scan_at = time.monotonic() + scan_period
+                        if self.production_mode and self.reference_barcode:
+                            print()
+                            self.simulate_demo_scan(demo_barcodes[current_demo_index])
+                            show_prompt = True
+                    continue
+                
+                show_prompt = True
+                if command == 'q':
                     break
+                elif command == 'c':
+                    if demo_barcodes[current_demo_index] != "NO_BARCODE":
+                        self.reference_barcode = demo_barcodes[current_demo_index]
+                        self.reference_type = "EAN13"
+                        print(f"\n[SUCCESS] REFERENCE CAPTURED: {self.reference_barcode}")
+                        self.display_status("Reference Set!", f"Demo: {self.reference_barcode}")
+                        self.log_result('REFERENCE_SET', self.reference_barcode, self.reference_type)
+                        self.play_buzzer_tone('reference_captured')
+                    else:
+                        print("[ERROR] Cannot capture reference from NO_BARCODE")
+                        self.play_buzzer_tone('no_barcode')
+                elif command == 's':
+                    if not self.reference_barcode:
+                        print("[WARNING] No reference set! Press 'C' first.")
+                        self.play_buzzer_tone('no_barcode')
+                    else:
+                        self.production_mode = not self.production_mode
+                        if self.production_mode:
+                            print(f"\n[START] DEMO PRODUCTION MODE STARTED")
+                            print(f"Reference: {self.reference_barcode}")
+                            self.display_status("Demo Production ON", f"Ref: {self.reference_barcode}")
+                            self.play_buzzer_tone('start')
+                            next_scan_at = time.monotonic() + scan_period
+                        else:
+                            print("\n[PAUSE] DEMO PRODUCTION MODE PAUSED")
+                            self.display_status("Demo Production OFF", "Press S to start")
+                            self.play_buzzer_tone('stop')
+                elif command == 'r':
+                    self.reference_barcode = None
+                    self.reference_type = None
+                    self.production_mode = False
+                    self.display_status("Reference Reset", "Press C to set new")
+                    print("[OK] Reference reset")
+                elif command == 'l':
+                    self.view_logs()
+                elif command == 'n':
+                    current_demo_index = (current_demo_index + 1) % len(demo_barcodes)
+                    print(f"Switched to: {demo_barcodes[current_demo_index]}")
+                elif command:
+                    print("Invalid command. Use: C, S, R, L, Q, N")
         
         except KeyboardInterrupt:
             print("\n[SHUTDOWN] Demo mode interrupted by user...")
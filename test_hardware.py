@@ -13,8 +13,13 @@ BUZZER_PIN = 17      # Buzzer on GPIO 17
 START_BTN_PIN = 22   # Start/Stop button on GPIO 22
 CAPTURE_BTN_PIN = 27 # Capture reference button on GPIO 27
 
+# Single PWM channel for the buzzer, created in setup_gpio()
+buzzer_pwm = None
+
 def setup_gpio():
     """Setup GPIO pins"""
+    global buzzer_pwm
+    
     GPIO.setmode(GPIO.BCM)
     GPIO.setwarnings(False)
     
@@ -22,6 +27,10 @@ def setup_gpio():
     GPIO.setup(BUZZER_PIN, GPIO.OUT)
     GPIO.output(BUZZER_PIN, GPIO.LOW)
     
+    # Create the PWM channel once and keep it running silent (0% duty)
+    buzzer_pwm = GPIO.PWM(BUZZER_PIN, 1000)
+    buzzer_pwm.start(0)
+    
     # Setup button pins with pull-up resistors
     GPIO.setup(START_BTN_PIN, GPIO.IN, pull_up_down=GPIO.PUD_UP)
     GPIO.setup(CAPTURE_BTN_PIN, GPIO.IN, pull_up_down=GPIO.PUD_UP)
@@ -31,22 +40,22 @@ def setup_gpio():
     print(f"  Start Button: GPIO {START_BTN_PIN}")
     print(f"  Capture Button: GPIO {CAPTURE_BTN_PIN}")
 
+def buzzer_beep(frequency, duration):
+    """Generate buzzer beep using the shared PWM channel"""
+    try:
+        buzzer_pwm.ChangeFrequency(frequency)
+        buzzer_pwm.ChangeDutyCycle(50)  # 50% duty cycle
+        time.sleep(duration)
+        buzzer_pwm.ChangeDutyCycle(0)
+    except Exception as e:
+        print(f"Buzzer error: {e}")
+
 def test_buzzer():
     """Test buzzer with different tones"""
     print("\n" + "=" * 50)
     print("TESTING BUZZER (GPIO 17)")
     print("=" * 50)
     
-    def buzzer_beep(frequency, duration):
-        """Generate buzzer beep using PWM"""
-        try:
-            pwm = GPIO.PWM(BUZZER_PIN, frequency)
-            pwm.start(50)  # 50% duty cycle
-            time.sleep(duration)
-            pwm.stop()
-        except Exception as e:
-            print(f"Buzzer error: {e}")
-    
     print("Testing different buzzer tones...")
     
     # Test 1: Reference captured (3 ascending beeps)
@@ -95,37 +104,29 @@ def test_buttons():
     print(f"  GPIO {CAPTURE_BTN_PIN} - Capture button")
     print("Press Ctrl+C to exit button test")
     
-    last_start_state = GPIO.HIGH
-    last_capture_state = GPIO.HIGH
+    def on_start(channel):
+        print(f"[BUTTON] Start/Stop button (GPIO {START_BTN_PIN}) pressed!")
+        # Quick beep for button press
+        buzzer_beep(1500, 0.1)
+    
+    def on_capture(channel):
+        print(f"[BUTTON] Capture button (GPIO {CAPTURE_BTN_PIN}) pressed!")
+        # Quick beep for button press
+        buzzer_beep(2000, 0.1)
+    
+    # Edge-triggered callbacks; the main thread just waits for Ctrl+C
+    GPIO.add_event_detect(START_BTN_PIN, GPIO.FALLING, callback=on_start, bouncetime=200)
+    GPIO.add_event_detect(CAPTURE_BTN_PIN, GPIO.FALLING, callback=on_capture, bouncetime=200)
     
     try:
         while True:
-            # Check start button
-            start_state = GPIO.input(START_BTN_PIN)
-            if start_state == GPIO.LOW and last_start_state == GPIO.HIGH:
-                print(f"[BUTTON] Start/Stop button (GPIO {START_BTN_PIN}) pressed!")
-                # Quick beep for button press
-                pwm = GPIO.PWM(BUZZER_PIN, 1500)
-                pwm.start(50)
-                time.sleep(0.1)
-                pwm.stop()
-            last_start_state = start_state
-            
-            # Check capture button
-            capture_state = GPIO.input(CAPTURE_BTN_PIN)
-            if capture_state == GPIO.LOW and last_capture_state == GPIO.HIGH:
-                print(f"[BUTTON] Capture button (GPIO {CAPTURE_BTN_PIN}) pressed!")
-                # Quick beep for button press
-                pwm = GPIO.PWM(BUZZER_PIN, 2000)
-                pwm.start(50)
-                time.sleep(0.1)
-                pwm.stop()
-            last_capture_state = capture_state
-            
-            time.sleep(0.01)  # Small delay to prevent excessive CPU usage
+            time.sleep(1)
             
     except KeyboardInterrupt:
         print("\nButton test completed!")
+    finally:
+        GPIO.remove_event_detect(START_BTN_PIN)
+        GPIO.remove_event_detect(CAPTURE_BTN_PIN)
 
 def test_lcd():
     """Test LCD display"""
@@ -224,6 +225,8 @@ def main():
         print(f"Test error: {e}")
     finally:
         # Cleanup
+        if buzzer_pwm:
+            buzzer_pwm.stop()
         GPIO.cleanup()
         print("\nHardware test completed!")
         print("GPIO cleanup done.")
@@ -25,6 +25,29 @@ except ImportError:
     LCD_AVAILABLE = False
     print("⚠ RPLCD not available")
 
+class CachedLCD:
+    """Character LCD wrapper that only re-sends rows whose text changed."""
+    
+    def __init__(self, lcd, cols=16, rows=2):
+        self._lcd = lcd
+        self.cols = cols
+        self._rows = [None] * rows
+    
+    def write_line(self, row, text):
+        text = text[:self.cols].ljust(self.cols)
+        if text == self._rows[row]:
+            return
+        self._lcd.cursor_pos = (row, 0)
+        self._lcd.write_string(text)
+        self._rows[row] = text
+    
+    def clear(self):
+        self._lcd.clear()
+        self._rows = [''.ljust(self.cols)] * len(self._rows)
+    
+    def close(self):
+        self._lcd.close()
+
 def test_hardware():
     """Test all hardware components"""
     print("\n" + "=" * 60)
@@ -46,8 +69,8 @@ def test_hardware():
             
             # Test buttons
             print("Testing buttons...")
-            capture_btn = Button(22, pull_up=True)
-            start_btn = Button(27, pull_up=True)
+            capture_btn = Button(22, pull_up=True, bounce_time=0.02)
+            start_btn = Button(27, pull_up=True, bounce_time=0.02)
             
             print("✓ Buttons initialized")
             print("  - GPIO 22 (Capture): Ready")
@@ -71,14 +94,13 @@ def test_hardware():
     if LCD_AVAILABLE:
         try:
             print("\nTesting LCD display...")
-            lcd = CharLCD(i2c_expander='PCF8574', address=0x27, 
-                         port=1, cols=16, rows=2, 
-                         charmap='A02', auto_linebreaks=True)
+            lcd = CachedLCD(CharLCD(i2c_expander='PCF8574', address=0x27, 
+                                    port=1, cols=16, rows=2, 
+                                    charmap='A02', auto_linebreaks=True))
             
             lcd.clear()
-            lcd.write_string("Hardware Test")
-            lcd.cursor_pos = (1, 0)
-            lcd.write_string("All Systems OK")
+            lcd.write_line(0, "Hardware Test")
+            lcd.write_line(1, "All Systems OK")
             
             print("✓ LCD test completed")
             print("  - I2C address: 0x27")
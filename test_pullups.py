@@ -4,12 +4,77 @@ Test script to verify internal pull-up resistors are working correctly
 """
 
 import RPi.GPIO as GPIO
-import time
+import signal
+import sys
+from datetime import timedelta
+
+# libgpiod character-device API (optional); falls back to RPi.GPIO callbacks
+try:
+    import gpiod
+    GPIOD_AVAILABLE = True
+except ImportError:
+    GPIOD_AVAILABLE = False
+
+GPIO_CHIP = 'gpiochip0'
 
 # GPIO Pin Configuration
 START_BTN_PIN = 22   # Start/Stop button on GPIO 22
 CAPTURE_BTN_PIN = 27 # Capture reference button on GPIO 27
 
+# Edge messages, formatted once
+MSG_START_PRESSED = f"🔴 Start Button (GPIO {START_BTN_PIN}) PRESSED!\n"
+MSG_START_RELEASED = f"🟢 Start Button (GPIO {START_BTN_PIN}) RELEASED!\n"
+MSG_CAPTURE_PRESSED = f"🔴 Capture Button (GPIO {CAPTURE_BTN_PIN}) PRESSED!\n"
+MSG_CAPTURE_RELEASED = f"🟢 Capture Button (GPIO {CAPTURE_BTN_PIN}) RELEASED!\n"
+
+# (pin, level) -> message; pull-up wiring reads LOW while pressed
+EDGE_MESSAGES = {
+    (START_BTN_PIN, GPIO.LOW): MSG_START_PRESSED,
+    (START_BTN_PIN, GPIO.HIGH): MSG_START_RELEASED,
+    (CAPTURE_BTN_PIN, GPIO.LOW): MSG_CAPTURE_PRESSED,
+    (CAPTURE_BTN_PIN, GPIO.HIGH): MSG_CAPTURE_RELEASED,
+}
+
+def watch_edges_gpiod():
+    """Block in the kernel on button edges via libgpiod (v1 or v2 bindings)."""
+    pins = (START_BTN_PIN, CAPTURE_BTN_PIN)
+    
+    if hasattr(gpiod, 'request_lines'):
+        # libgpiod 2.x
+        from gpiod.line import Bias, Edge
+        settings = gpiod.LineSettings(edge_detection=Edge.BOTH, bias=Bias.PULL_UP, 
+                                      debounce_period=timedelta(milliseconds=20))
+        with gpiod.request_lines(f'/dev/{GPIO_CHIP}', consumer='test_pullups', 
+                                 config={pins: settings}) as request:
+            while True:
+                if not request.wait_edge_events(timedelta(seconds=1)):
+                    continue
+                for event in request.read_edge_events():
+                    falling = event.event_type == event.Type.FALLING_EDGE
+                    level = GPIO.LOW if falling else GPIO.HIGH
+                    sys.stdout.write(EDGE_MESSAGES[event.line_offset, level])
+                sys.stdout.flush()
+    
+    # libgpiod 1.x
+    chip = gpiod.Chip(GPIO_CHIP)
+    lines = chip.get_lines(list(pins))
+    lines.request(consumer='test_pullups', type=gpiod.LINE_REQ_EV_BOTH_EDGES, 
+                  flags=gpiod.LINE_REQ_FLAG_BIAS_PULL_UP)
+    try:
+        while True:
+            ready = lines.event_wait(sec=1)
+            if not ready:
+                continue
+            for line in ready:
+                event = line.event_read()
+                falling = event.type == gpiod.LineEvent.FALLING_EDGE
+                level = GPIO.LOW if falling else GPIO.HIGH
+                sys.stdout.write(EDGE_MESSAGES[line.offset(), level])
+            sys.stdout.flush()
+    finally:
+        lines.release()
+        chip.close()
+
 def test_pullups():
     """Test internal pull-up resistors"""
     print("=" * 60)
@@ -54,28 +119,26 @@ def test_pullups():
         print()
         print("Press buttons to test (Ctrl+C to exit):")
         
-        last_start_state = GPIO.HIGH
-        last_capture_state = GPIO.HIGH
+        if GPIOD_AVAILABLE:
+            # Hand the pins over to libgpiod (it re-applies the pull-ups)
+            GPIO.cleanup()
+            try:
+                watch_edges_gpiod()
+            except OSError as e:
+                print(f"libgpiod unavailable ({e}) - using RPi.GPIO callbacks")
+                GPIO.setmode(GPIO.BCM)
+                GPIO.setup(START_BTN_PIN, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+                GPIO.setup(CAPTURE_BTN_PIN, GPIO.IN, pull_up_down=GPIO.PUD_UP)
+        
+        def on_edge(channel):
+            sys.stdout.write(EDGE_MESSAGES[channel, GPIO.input(channel)])
+            sys.stdout.flush()
+        
+        # Kernel edge detection; the main thread sleeps until Ctrl+C
+        GPIO.add_event_detect(START_BTN_PIN, GPIO.BOTH, callback=on_edge, bouncetime=20)
+        GPIO.add_event_detect(CAPTURE_BTN_PIN, GPIO.BOTH, callback=on_edge, bouncetime=20)
+        signal.pause()
         
-        while True:
-            # Check start button
-            start_state = GPIO.input(START_BTN_PIN)
-            if start_state == GPIO.LOW and last_start_state == GPIO.HIGH:
-                print(f"🔴 Start Button (GPIO {START_BTN_PIN}) PRESSED!")
-            elif start_state == GPIO.HIGH and last_start_state == GPIO.LOW:
-                print(f"🟢 Start Button (GPIO {START_BTN_PIN}) RELEASED!")
-            last_start_state = start_state
-            
-            # Check capture button
-            capture_state = GPIO.input(CAPTURE_BTN_PIN)
-            if capture_state == GPIO.LOW and last_capture_state == GPIO.HIGH:
-                print(f"🔴 Capture Button (GPIO {CAPTURE_BTN_PIN}) PRESSED!")
-            elif capture_state == GPIO.HIGH and last_capture_state == GPIO.LOW:
-                print(f"🟢 Capture Button (GPIO {CAPTURE_BTN_PIN}) RELEASED!")
-            last_capture_state = capture_state
-            
-            time.sleep(0.01)  # Small delay
-            
     except KeyboardInterrupt:
         print("\nTest completed!")
     except Exception as e: